@@ -8,21 +8,23 @@ the mysql database.
 The class FuncVar has information about a function or variable which can have annotations. The lets as determine how
 many annotations could be present if everything was annotated.
 
-AnnotationAnalyzer inherits from ast.NodeVisitor. This function is called on the abstract syntax tree of a module.
-It then traverses the tree and extracts all annotations, variables and functions.
+AnnotationAnalyzer is called on the abstract syntax tree of a module. It then traverses the tree and extracts all
+annotations, variables and functions.
 
 """
 import ast
-import clipboard
-from enum import Enum
-import json
-import logging
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from enum import IntEnum
+import functools
+from itertools import repeat
 import os
+import re
 import time
-from types import NoneType
-from typing import Union, Optional
+from typing import NamedTuple, Union, Optional
 
-import mysql.connector.errors
+import orjson
 
 # Own imports
 from scripts.sql.db_fill_repos import DBHelper
@@ -41,15 +43,50 @@ TAnnotation = Union[ast.Name, ast.Subscript, ast.Attribute, ast.Constant,
                     #            1.0
                     ast.Compare, float, ast.JoinedStr]
 
-
-class FuncVarType(Enum):
+# How handle_annotation_basic treats a node of the given type:
+# 0 counts a type, 1 Subscript, 2 Attribute, 3 BinOp, 4 Call, 5 Slice, 6 Tuple/ List, 7 UnaryOp
+_BASIC_KIND: dict[type, int] = {
+    ast.Name: 0, ast.Constant: 0, ast.Subscript: 1, ast.Attribute: 2, ast.BinOp: 3, ast.Call: 4, ast.Slice: 5,
+    ast.Tuple: 6, ast.List: 6, ast.UnaryOp: 7,
+}
+
+# Base types which are counted as python types by get_base_type. Everything else is user defined.
+_PYTHON_TYPES = frozenset({
+    "None", "bool", "int", "float", "complex", "str", "bytes", "bytearray", "memoryview", "range", "tuple", "list",
+    "set", "frozenset", "dict", "ellipsis", "...", "type", "object", "NoneType", "Any", "Union", "Optional",
+    "Callable", "TypeVar", "Generic", "ClassVar", "Final", "Literal", "Annotated", "TypedDict", "Protocol",
+    "runtime_checkable", "AbstractSet",
+})
+
+# Folders which are not analyzed
+_IGNORED_FOLDERS = frozenset({"mypy", "python2.6"})
+_PY_SUFFIXES = (".py", ".pyi")
+
+# Child fields of every ast node class. Filled on first sight of a class during the traversal.
+_NODE_FIELDS: dict[type, tuple[str, ...]] = {}
+# Matches every annotated argument: a name followed by a colon that is not part of :=
+# Bytes of non-ASCII characters count as part of a name
+_ARGUMENT_ANNOTATION_HINT = re.compile(rb"[\w\x80-\xff][\s\\]*:(?!=)")
+
+
+class FuncVarType(IntEnum):
     FUNCTION_ARG = 1
     FUNCTION_RETURN = 2
     VARIABLE = 3
 
 
-class Annotation:
+# String stored in the database for each FuncVarType
+_FVT_STR = {
+    FuncVarType.FUNCTION_ARG: "argument",
+    FuncVarType.FUNCTION_RETURN: "return",
+    FuncVarType.VARIABLE: "variable",
+}
+
+
+class Annotation(NamedTuple):
     """Contains all information about a single annotation.
+    A row of the annotation table. The analyzer stores plain tuples in this field order, Annotation(*row) gives
+    them names.
 
     Attributes:
         repo_id (int)               : The id of the repository in the database.
@@ -68,21 +105,19 @@ class Annotation:
                 annotation. (e.g. 4 in x: Optional[Union[str, int]])
 
     """
-    def __init__(self, repo_id: int, relative_path: str, func_var_name: str,
-                 lineno: int, annot_name: str, fvt: FuncVarType,
-                 base_type: str, entire_annotation: str, count: int):
-        self.repo_id: int = repo_id                         # INT
-        self.relative_path: str = relative_path             # VARCHAR(270)
-        self.func_var_name: str = func_var_name             # VARCHAR(135)
-        self.lineno: int = lineno                           # INT
-        # If annotation is a function argument, the name of the argument
-        # If annotation is a function return, the empty string
-        # If annotation is a variable, func_var_name == annot_name
-        self.annot_name: str = annot_name                   # VARCHAR(135)
-        self.func_var_type: FuncVarType = fvt               # VARCHAR(45)
-        self.base_type: str = base_type                     # VARCHAR(45)
-        self.entire_annotation: str = entire_annotation     # VARCHAR(540)
-        self.count: int = count                             # INT
+    repo_id: int                                        # INT
+    relative_path: str                                  # VARCHAR(270)
+    func_var_name: str                                  # VARCHAR(135)
+    lineno: int                                         # INT
+    # If annotation is a function argument, the name of the argument
+    # If annotation is a function return, the empty string
+    # If annotation is a variable, func_var_name == annot_name
+    annot_name: str                                     # VARCHAR(135)
+    func_var_type: Union[FuncVarType, str]              # VARCHAR(45)
+    base_type: str                                      # VARCHAR(45)
+    entire_annotation: str                              # VARCHAR(540)
+    # Shadows tuple.count on purpose, the field is named like the column
+    count: int  # type: ignore[assignment]              # INT
 
     def __repr__(self):
         return "Annotation: repo_id: {}, relative_path: {}, " \
@@ -106,15 +141,21 @@ class FuncVar:
         num_var (int)           : The total number of variables in the function.
                 (Arguments and return if exists, for variable it's just 1)
         num_var_annotated (int) : The total number of those variables which are annotated.
+        fvt (FuncVarType)       : Function or variable. None if not set.
 
     """
-    def __init__(self, repo_id: int, rel_path: str, name: str, lineno: int):
+    # No __dict__ per instance
+    __slots__ = ("repo_id", "relative_path", "name", "lineno", "num_var", "num_var_annotated", "fvt")
+
+    def __init__(self, repo_id: int, rel_path: str, name: str, lineno: int,
+                 num_var: int = 0, num_var_annotated: int = 0):
         self.repo_id: int = repo_id
         self.relative_path: str = rel_path
         self.name: str = name
         self.lineno: int = lineno
-        self.num_var: int = 0
-        self.num_var_annotated: int = 0
+        self.num_var: int = num_var
+        self.num_var_annotated: int = num_var_annotated
+        self.fvt: Optional[FuncVarType] = None
 
     def set_func_var_type(self, fvt: FuncVarType):
         self.fvt = fvt
@@ -132,52 +173,143 @@ class FuncVar:
                 self.num_var, self.num_var_annotated)
 
 
-class AnnotationAnalyzer(ast.NodeVisitor):
+@functools.lru_cache(maxsize=8192)
+def _cached_base_type(unparsed_annotation: str) -> str:
+    """Base type of a non-empty annotation string. See AnnotationAnalyzer.get_base_type.
+    Cached since the same annotations ("int", "str", "Optional[str]", ...) appear in almost every module.
+    """
+    # Look at string before first '[' or ',' or ' '
+    end = len(unparsed_annotation)
+    for delimiter in "[, ":
+        index = unparsed_annotation.find(delimiter, 0, end)
+        if index != -1:
+            end = index
+    base_type = unparsed_annotation[:end]
+    # Check if base type is a python type
+    if base_type in _PYTHON_TYPES:
+        if base_type == "...":
+            base_type = "ellipsis"
+        return base_type
+    else:
+        return "user_defined"
+
+
+class AnnotationAnalyzer:
     """ast-based analyzer for annotations. Initialized for every module.
 
     When called on a module, it traverses the abstract syntax tree and extracts all annotations, variables and
     functions. Keeping track of all variables and functions even without annotations allows to infer how much
     could have been annotated.
-    AnnotationAnalyzer.visit(module_ast) is called on the abstract syntax tree of a module. That method is provided
-    by the ast.NodeVisitor class. It then traverses the tree.
-    visit_FunctionDef, visit_AnnAssign and visit_Assign are overriden by this class and will be called during
-    the traversal. To extract annotations and other information, separate methods are called.
+    AnnotationAnalyzer.visit(module_ast) is called on the abstract syntax tree of a module. It then traverses the tree.
+    visit_FunctionDef, visit_AnnAssign and visit_Assign will be called during the traversal. They are looked up in a
+    table keyed by the node class instead of building the method name for every node like ast.NodeVisitor does.
+    To extract annotations and other information, separate methods are called.
 
     Attributes:
         repo_id (int)                   : The id of the repository in the database.
         rel_path (str)                  : The relative path to the module file.
         total_annotations (int)         : The total number of annotations in the module.
         last_count (int)                : The number of types in the last annotation.
-        funcs_and_vars (list[FuncVar])  : A list of all functions and variables in the module.
-        annotations (list[Annotation])  : A list of all annotations in the module.
+        fv_* (list)                     : Functions and variables of the module stored column-wise.
+                One entry per function/ variable in each list.
+        funcs_and_vars (list[FuncVar])  : A list of all functions and variables in the module. Built on demand.
+        annotations (list[tuple])       : A list of all annotations in the module. Tuples in the field order of
+                Annotation.
         unannotated_names (list[str])   : A list of all argument names that are not annotated.
-        logger (logging.Logger)         : A logger to log errors.
 
     """
-    def __init__(self, repo_id: int = -1, rel_path: str = "", progress: float = 0.):
+    def __init__(self, repo_id: int = -1, rel_path: str = ""):
         self.repo_id = repo_id
         self.rel_path = rel_path
         self.total_annotations = 0
         self.last_count = 0
-        self.funcs_and_vars: list[FuncVar] = []
-        self.annotations: list[Annotation] = []
+        # Functions and variables, stored column-wise to avoid creating a FuncVar object for each of them
+        self.fv_names: list[str] = []
+        self.fv_linenos: list[int] = []
+        self.fv_num_var: list[int] = []
+        self.fv_num_annot: list[int] = []
+        # Annotations, stored as tuples to avoid creating an Annotation object for each of them
+        self.annotations: list[tuple] = []
         self.unannotated_names: list[str] = []
-        self.logger = self.init_logger()
-        self.progress = progress        # Used to print current progress
+        self._dispatch = {
+            ast.FunctionDef: self.visit_FunctionDef,
+            ast.AnnAssign: self.visit_AnnAssign,
+            ast.Assign: self.visit_Assign,
+        }
+
+    @property
+    def funcs_and_vars(self) -> list[FuncVar]:
+        """All functions and variables of the module as FuncVar objects."""
+        return [FuncVar(self.repo_id, self.rel_path, name, lineno, num_var, num_var_annotated)
+                for name, lineno, num_var, num_var_annotated
+                in zip(self.fv_names, self.fv_linenos, self.fv_num_var, self.fv_num_annot)]
+
+    def add_func_var(self, name: str, lineno: int, num_var: int, num_var_annotated: int):
+        """Add a function or variable to the column lists."""
+        self.fv_names.append(name)
+        self.fv_linenos.append(lineno)
+        self.fv_num_var.append(num_var)
+        self.fv_num_annot.append(num_var_annotated)
+
+    def visit(self, node: ast.AST):
+        """Visit a node. Nodes without a visit_ method are traversed by generic_visit."""
+        visitor = self._dispatch.get(node.__class__)
+        if visitor is None:
+            self.generic_visit(node)
+        else:
+            visitor(node)
 
-    def visit_FunctionDef(self, node: ast.AST):
+    def generic_visit(self, node: ast.AST):
+        """Visit all children of a node in source order.
+        Uses an explicit stack instead of recursing through visit for every node.
+        """
+        dispatch = self._dispatch
+        stack = self.get_child_nodes(node)
+        stack.reverse()
+        while stack:
+            child = stack.pop()
+            visitor = dispatch.get(child.__class__)
+            if visitor is None:
+                children = self.get_child_nodes(child)
+                children.reverse()
+                stack.extend(children)
+            else:
+                visitor(child)
+
+    @staticmethod
+    def get_child_nodes(node: ast.AST) -> list[ast.AST]:
+        """Get the direct children of a node. Same as ast.iter_child_nodes but without the iter_fields tuples."""
+        cls = node.__class__
+        fields = _NODE_FIELDS.get(cls)
+        if fields is None:
+            fields = _NODE_FIELDS[cls] = cls._fields
+        children = []
+        for field in fields:
+            value = getattr(node, field, None)
+            if isinstance(value, ast.AST):
+                children.append(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        children.append(item)
+        return children
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
         """Visit a function definition.
         Extract information about the function and handle annotations if present.
         """
         func_lineno = node.lineno
         # Get function name. "" for functions that don't have a name
         func_name = node.name if node.name else ""
-        func = FuncVar(self.repo_id, self.rel_path, func_name, func_lineno)
+        args = node.args.args
+        num_var = len(args)
+        num_var_annotated = 0
+        arg_names = []
         # Check if function arguments are annotated
-        for arg in node.args.args:
-            func.increase_num_var()
+        for arg in args:
+            arg_names.append(arg.arg)
             if arg.annotation:
-                func.increase_num_var_annotated()
+                num_var_annotated += 1
                 # Analyze annotation
                 self.completely_handle_annotation(
                     annot=arg.annotation,
@@ -188,8 +320,8 @@ class AnnotationAnalyzer(ast.NodeVisitor):
                 )
         # Check if function return type is annotated
         if node.returns:
-            func.increase_num_var()
-            func.increase_num_var_annotated()
+            num_var += 1
+            num_var_annotated += 1
             self.completely_handle_annotation(
                 annot=node.returns,
                 func_var_name=func_name,
@@ -199,23 +331,21 @@ class AnnotationAnalyzer(ast.NodeVisitor):
             )
         # If return is not annotated check if function contains a return
         elif self.contains_return(node.body):
-            func.increase_num_var()
+            num_var += 1
         # Check if function is partially annotated
-        if 0 < func.num_var_annotated < func.num_var:
-            # Get argument names that have no annotation
-            for arg in node.args.args:
-                self.unannotated_names.append(arg.arg)
+        if 0 < num_var_annotated < num_var:
+            # Get argument names, collected in the loop above
+            self.unannotated_names.extend(arg_names)
         # Add function to list
-        self.funcs_and_vars.append(func)
-        self.generic_visit(node)
+        self.add_func_var(func_name, func_lineno, num_var, num_var_annotated)
+        # Only the body can contain further functions and variables. Arguments and return were handled above.
+        for statement in node.body:
+            self.visit(statement)
 
-    def visit_AnnAssign(self, node):
+    def visit_AnnAssign(self, node: ast.AnnAssign):
         var_name = self.get_var_name(node.target)
         # Handle the variable itself
-        var = FuncVar(self.repo_id, self.rel_path, var_name, node.lineno)
-        var.increase_num_var()
-        var.increase_num_var_annotated()
-        self.funcs_and_vars.append(var)
+        self.add_func_var(var_name, node.lineno, 1, 1)
         # Handle its annotation
         self.completely_handle_annotation(
             annot=node.annotation,
@@ -225,24 +355,18 @@ class AnnotationAnalyzer(ast.NodeVisitor):
             annot_name=var_name
         )
 
-    def visit_Assign(self, node):
+    def visit_Assign(self, node: ast.Assign):
         for target in node.targets:
             # Tuple is for multiple assignments: a, b = 1, 2
             if isinstance(target, ast.Tuple):
                 for element in target.elts:
                     name = self.get_var_name(element)
-                    var = FuncVar(self.repo_id, self.rel_path, name,
-                                  node.lineno)
-                    var.increase_num_var()
-                    self.funcs_and_vars.append(var)
+                    self.add_func_var(name, node.lineno, 1, 0)
             # Single assignment: a = 1
             else:
                 name = self.get_var_name(target)
-                var = FuncVar(self.repo_id, self.rel_path, name,
-                              node.lineno)
-                var.increase_num_var()
-                self.funcs_and_vars.append(var)
-        self.generic_visit(node)
+                self.add_func_var(name, node.lineno, 1, 0)
+        # Targets and value are expressions. They cannot contain functions or assignments, so they are not visited.
 
     def completely_handle_annotation(self, annot: TAnnotation,
                                      func_var_name: str,
@@ -250,60 +374,58 @@ class AnnotationAnalyzer(ast.NodeVisitor):
                                      fvt: FuncVarType,
                                      annot_name: str):
         self.total_annotations += 1
-        # handle_annotation was initially created and expanded to investigate which types could be present
-        # self.handle_annotation(annot)
-        # handle_annotation_basic was later used in the main analysis to count the number of types in an annotation:
+        # handle_annotation_basic counts the number of types in an annotation:
         # Optional[Union[str, int]] -> 4
         self.handle_annotation_basic(annot)
         # last_count attribute is used to count the number types in an annotation. See example above.
         self.last_count = 0
-        # Create annotation object to later store in database
-        annot = Annotation(
-            repo_id=self.repo_id,
-            relative_path=self.rel_path,
-            func_var_name=func_var_name,
-            lineno=lineno,
-            annot_name=annot_name,
-            fvt=fvt,
-            base_type=self.get_base_type(ast.unparse(annot)),
-            entire_annotation=ast.unparse(annot),
-            count=self.last_count
-        )
-        self.annotations.append(annot)
+        # Unparse only once, it walks the entire annotation ast
+        entire_annotation = ast.unparse(annot)
+        # Store annotation to later store in database
+        self.annotations.append((
+            self.repo_id, self.rel_path, func_var_name, lineno, annot_name, fvt,
+            self.get_base_type(entire_annotation), entire_annotation, self.last_count
+        ))
 
     def handle_annotation_basic(self, annotation: TAnnotation):
         """Count the number of types in an annotation.
         Optional[Union[str, int]] -> 4
+        The annotation ast is walked with an explicit stack. _BASIC_KIND tells how each node type is handled.
         """
-        # Found a type
-        if isinstance(annotation, ast.Name) or isinstance(annotation,
-                                                          ast.Constant):
-            self.last_count += 1
-        # Correctly traverse annotation ast
-        elif isinstance(annotation, ast.Subscript):
-            self.handle_annotation_basic(annotation.value)
-            self.handle_annotation_basic(annotation.slice)
-        elif isinstance(annotation, ast.Attribute):
-            self.handle_annotation_basic(annotation.value)
-        elif isinstance(annotation, ast.BinOp):
-            self.handle_annotation_basic(annotation.left)
-            self.handle_annotation_basic(annotation.right)
-        elif isinstance(annotation, ast.Call):
-            self.handle_annotation_basic(annotation.func)
-        elif isinstance(annotation, ast.Slice):
-            if annotation.lower:
-                self.handle_annotation_basic(annotation.lower)
-            if annotation.upper:
-                self.handle_annotation_basic(annotation.upper)
-        elif isinstance(annotation, ast.Tuple) or \
-                isinstance(annotation, ast.List):
-            for element in annotation.elts:
-                self.handle_annotation_basic(element)
-        elif isinstance(annotation, ast.UnaryOp):
-            self.handle_annotation_basic(annotation.operand)
+        count = self.last_count
+        stack = [annotation]
+        while stack:
+            node = stack.pop()
+            kind = _BASIC_KIND.get(node.__class__)
+            if kind is None:
+                continue
+            # Found a type
+            if kind == 0:
+                count += 1
+            # Correctly traverse annotation ast
+            elif kind == 1:
+                stack.append(node.value)
+                stack.append(node.slice)
+            elif kind == 2:
+                stack.append(node.value)
+            elif kind == 3:
+                stack.append(node.left)
+                stack.append(node.right)
+            elif kind == 4:
+                stack.append(node.func)
+            elif kind == 5:
+                if node.lower:
+                    stack.append(node.lower)
+                if node.upper:
+                    stack.append(node.upper)
+            elif kind == 6:
+                stack.extend(node.elts)
+            else:  # kind == 7
+                stack.append(node.operand)
+        self.last_count = count
 
     @staticmethod
-    def contains_return(body) -> bool:
+    def contains_return(body: list[ast.stmt]) -> bool:
         """Check if a function contains a return statement.
         Only check for return statements that return something. return / return None do not need to be annotated.
         """
@@ -339,11 +461,7 @@ class AnnotationAnalyzer(ast.NodeVisitor):
             return True
         # or a negative constant: -1, -2, -3
         if isinstance(annot, ast.UnaryOp):
-            if not isinstance(annot.op, ast.USub):
-                return False
-            if not isinstance(annot.operand, ast.Constant):
-                return False
-            return True
+            return isinstance(annot.op, ast.USub) and isinstance(annot.operand, ast.Constant)
         return False
 
     @staticmethod
@@ -371,164 +489,43 @@ class AnnotationAnalyzer(ast.NodeVisitor):
         """
         if not unparsed_annotation:
             return ""
-        # Look at string before first '[' or ',' or ' '
-        base_type = (
-            unparsed_annotation.split('[')[0].split(',')[0].split(' '))[0]
-        # Check if base type is a python type
-        if base_type in ["None", "bool", "int", "float", "complex", "str",
-                         "bytes", "bytearray", "memoryview", "range",
-                         "tuple", "list", "set", "frozenset", "dict",
-                         "ellipsis", "...", "type", "object",
-                         "NoneType", "Any", "Union", "Optional", "Callable",
-                         "TypeVar", "Generic", "ClassVar", "Final",
-                         "Literal", "Annotated", "TypedDict", "Protocol",
-                         "runtime_checkable", "AbstractSet"]:
-            if base_type == "...":
-                base_type = "ellipsis"
-            return base_type
-        else:
-            return "user_defined"
-
-    def handle_annotation(self, annotation: TAnnotation,
-                          verbose: Union[bool, str] = False):
-        # debug help
-        if verbose == "full":
-            print("{}% L: {}, A: {}".format(
-                self.progress, annotation.lineno, annotation))
-        # This was used during testing to quickly debug to a specific line which caused an error.
-        if annotation.lineno in [1, 4, 7, 10]:
-            pass  # break point
-        # Check correctness of self defined types
-        if not isinstance(annotation, TAnnotation):
-            self.log_error("Error at line {}: ".format(annotation.lineno) +
-                           "annotation is of unexpected type: " +
-                           repr(type(annotation)))
-        # annotation is a Name
-        elif isinstance(annotation, ast.Name):
-            # print(f"Found annotation: {annotation.id}")
-            self.last_count += 1
-        # annotation is a Subscript
-        elif isinstance(annotation, ast.Subscript):
-            self.handle_annotation(annotation.value)
-            self.handle_annotation(annotation.slice)
-        # Annotation is an attribute
-        elif isinstance(annotation, ast.Attribute):
-            self.handle_annotation(annotation.value)
-            if not isinstance(annotation.attr, str):
-                self.log_error("Error at line {}: ".format(annotation.lineno) +
-                               "Attribute annotation, attr is not string.")
-                return
-        # Annotation is a constant value
-        elif isinstance(annotation, ast.Constant):
-            self.last_count += 1
-            possible_constant_types = \
-                Union[NoneType, bool, type(...), str, int, float, bytes]
-            if not isinstance(annotation.value, possible_constant_types):
-                self.log_error("Error at line {}: ".format(annotation.lineno) +
-                               "Constant annotation is of unexpected type: " +
-                               repr(type(annotation.value)) + " and value: " +
-                               repr(annotation.value))
-        # Annotation is a binary operation: type | type (Union[type, type])
-        elif isinstance(annotation, ast.BinOp):
-            self.handle_annotation(annotation.left)
-            self.handle_annotation(annotation.right)
-        # Annotation is a function call
-        elif isinstance(annotation, ast.Call):
-            # Get function name
-            self.handle_annotation(annotation.func)
-        # Annotation is a slice T["bs"...,2]
-        elif isinstance(annotation, ast.Slice):
-            if annotation.lower:
-                self.handle_annotation(annotation.lower)
-            if annotation.upper:
-                self.handle_annotation(annotation.upper)
-        # Annotation is a list
-        # Potentially: [type, type] instead of list[type]
-        # or correct from torchtyping: [type, type, type]
-        elif isinstance(annotation, ast.List):
-            for element in annotation.elts:
-                self.handle_annotation(element)
-        # Annotation is a unary operation: ~dtype or -4 before constant
-        elif isinstance(annotation, ast.UnaryOp):
-            if not isinstance(annotation.op, ast.USub) and \
-                    not isinstance(annotation.op, ast.Invert):
-                self.log_error("Error at line {}: ".format(annotation.lineno) +
-                               "UnaryOp annotation is of unexpected type:" +
-                               repr(type(annotation.op)))
-            self.handle_annotation(annotation.operand)
-        elif isinstance(annotation, ast.Tuple):
-            for element in annotation.elts:
-                self.handle_annotation(element)
-        # ### Now follow incorrect annotations
-        # Annotation is a boolean operation: type or type (Union[type, type])
-        elif isinstance(annotation, ast.BoolOp):
-            if not (isinstance(annotation.op, ast.Or) or
-                    isinstance(annotation.op, ast.And)):
-                self.log_error("Error at line {}: ".format(annotation.lineno) +
-                               "BoolOp annotation is of unexpected type:" +
-                               repr(type(annotation.op)))
-        # Incorrect annotation: {str: int}
-        elif isinstance(annotation, ast.Dict):
-            pass
-        # Incorrect annotation T if is_something() else Any
-        # instead of Union[T, Any]
-        elif isinstance(annotation, ast.IfExp):
-            pass
-        # Incorrect annotation: lambda x: x
-        elif isinstance(annotation, ast.Lambda):
-            pass
-        # Incorrect annotation: {str, int}
-        elif isinstance(annotation, ast.Set):
-            pass
-        # Incorrect annotation: x: int <= 1024
-        # instead of x: int and later assert x <= 1024
-        elif isinstance(annotation, ast.Compare):
-            pass
-        elif isinstance(annotation, float):
-            pass
-        elif isinstance(annotation, ast.JoinedStr):
-            pass
-        else:
-            self.log_error("HELL-Error at line {}: ".format(annotation.lineno) +
-                           "annotation is of unexpected type:" +
-                           repr(type(annotation)))
-
-    @staticmethod
-    def init_logger() -> logging.Logger:
-        new_logger = logging.getLogger("my_logger")
-        new_logger.setLevel(logging.ERROR)
-        handler = logging.FileHandler("error_log.txt", "w", "utf-8")
-        handler.setLevel(logging.ERROR)
-        formatter = logging.Formatter("%(asctime)s %(levelname)s: %(message)s")
-        handler.setFormatter(formatter)
-        new_logger.addHandler(handler)
-        return new_logger
-
-    def log_error(self, err_msg: str):
-        self.logger.error("\nError in file: " + clipboard.paste() + "\n"
-                          "Error message: " + err_msg + "\n")
+        return _cached_base_type(unparsed_annotation)
 
 
 def main_analyzer():
     """This function was used to initially test the analyzer and to find out which annotations are present in the
     repositories."""
     # Initialize
-    start_time = time.time()
-    db_helper = DBHelper()
-    # Go through the entire database
-    traverse_database(db=db_helper, start_time=start_time, verbose=True)
+    start_time = time.monotonic()
+    with DBHelper() as db_helper:
+        # Go through the entire database
+        traverse_database(db=db_helper, start_time=start_time, verbose=True)
 
 
 def traverse_database(db: Optional[DBHelper] = None, start_time: float = 0,
-                      verbose: Union[bool, str] = False):
+                      verbose: Union[bool, str] = False,
+                      jobs: Optional[int] = None):
     """This function goes through every year, user and repository in the database and calls analyze_repository() on
-    every repository."""
+    every repository.
+    start_time is the time.monotonic() value the analysis started at. It is used for the progress output.
+    The files are analyzed by a pool of jobs processes (defaults to the number of CPUs). jobs=1 analyzes them in this
+    process which is easier to debug."""
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as executor:
+        _traverse_database(db, start_time, verbose, executor)
+
+
+def _traverse_database(db: Optional[DBHelper], start_time: float,
+                       verbose: Union[bool, str],
+                       executor: Optional[Executor]):
     # Get the parent folder of all repositories
     repos_folder: str = get_repo_path()
     # Init variables for progress calculation
     total_repos: int = 1000
     current_repo: int = 0
     last_progress: float = 0
+    last_print: float = 0
     # Initial progress print
     if verbose and verbose != "full":
         print(f"0%")
@@ -544,17 +541,17 @@ def traverse_database(db: Optional[DBHelper] = None, start_time: float = 0,
                 current_repo += 1
                 # Progress calculation
                 progress = round(current_repo / total_repos * 100, 2)
-                elapsed_time = time.time() - start_time
-                estimated_total_time = elapsed_time / (progress / 100)
-                remaining_time = estimated_total_time - elapsed_time
-                # convert to readable time
-                remaining_time = time.strftime("%H:%M:%S",
-                                               time.gmtime(remaining_time))
-                elapsed_time = time.strftime("%H:%M:%S",
-                                             time.gmtime(elapsed_time))
+                # Print at most every 0.1 seconds, times are only calculated when printing
                 if verbose and verbose != "full" and \
                         progress > last_progress:
-                    print(f"{progress}%, elapsed time: {elapsed_time}, eta: {remaining_time}")
+                    now = time.monotonic()
+                    if now - last_print > 0.1:
+                        last_print = now
+                        elapsed_time = now - start_time
+                        estimated_total_time = elapsed_time / (progress / 100)
+                        remaining_time = estimated_total_time - elapsed_time
+                        print(f"{progress}%, elapsed time: {format_duration(elapsed_time)}, "
+                              f"eta: {format_duration(remaining_time)}")
                 last_progress = progress
                 # Get repo id in database
                 id_repo: int = -1
@@ -565,15 +562,26 @@ def traverse_database(db: Optional[DBHelper] = None, start_time: float = 0,
                              f"database.")
                 repo_folder: str = os.path.join(user_folder, repo)
                 # Check repo for annotations
-                if db:
-                    analyze_repository(repo_folder, id_repo, db, progress, False)
                 if verbose == "full":
                     print(f"{progress}%   Checking repo: {repo_folder}:",
                           flush=True)
-                analyze_repository(repo_folder, id_repo, db, progress, False)
+                analyze_repository(repo_folder, id_repo, db, progress, verbose == "full", executor)
                 if verbose == "full":
                     print(f"{progress}%   Done.", flush=True)
-        db.save_to_json("sql/db_query_" + year + ".json")
+        db.save_to_pickle("sql/db_query_" + year + ".pickle")
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration in seconds as HH:MM:SS.
+
+    Examples:
+        >>> format_duration(3725.4)
+        '01:02:05'
+
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
 def get_repo_path() -> str:
@@ -590,7 +598,8 @@ def get_repo_path() -> str:
 def analyze_repository(repo_folder: str, id_repo: int,
                        db: Optional[DBHelper] = None,
                        progress: float = 0.,
-                       verbose: bool = False):
+                       verbose: bool = False,
+                       executor: Optional[Executor] = None):
     """Analyze a given GitHub repository.
     Add annotations into the database.
 
@@ -600,142 +609,168 @@ def analyze_repository(repo_folder: str, id_repo: int,
         progress (float)        : The current progress in percent.
         db (DBHelper, optional) : Database connection. Defaults to None.
         verbose (bool)          : Print progress. Defaults to False.
+        executor (Executor, optional) : Pool to analyze the files in. Defaults to None, analyzing them one after
+                another in this process.
 
     """
-    for root, dirs, files in os.walk(repo_folder):
-        # Ignore the following folders
-        ignored_folders = ["mypy", "python2.6"]
-        for folder in ignored_folders:
-            if folder in dirs:
-                dirs.remove(folder)
-        # Check all files
-        for file in files:
-            # Ignore non-python files
-            file_path: str = os.path.join(root, file)
-            relative_file_path: str = file_path.replace(repo_folder + '/', "")
-            if not file.endswith(".py") and not file.endswith(".pyi"):
-                continue
-            # Ignore stub files without corresponding python file
-            if file.endswith(".pyi") and file[:-1] not in files:
-                continue
-            try:
-                with open(file_path) as f:
-                    code = f.read()
-            except (FileNotFoundError, UnicodeDecodeError):
-                continue
-            try:
-                node = ast.parse(code)
-                if verbose:
-                    print(f"{progress}%    Checking file: {file_path}.. ",
-                          end="")
-                # Copy file path to clipboard in case it fails
-                # clipboard.copy(file_path)
-                # Initiate analyzer
-                repo_annotations = AnnotationAnalyzer(id_repo, relative_file_path, progress)
-                # Check annotations
-                repo_annotations.visit(node)
-                # CHECKING CALCULATIONS
-                total_annotated = len(repo_annotations.annotations)
-                total_func_vars_annotated = 0
-                for func_var in repo_annotations.funcs_and_vars:
-                    total_func_vars_annotated += func_var.num_var_annotated
-                if repo_annotations.total_annotations != total_annotated:
-                    print(f"Error: total_annotations: "
-                          f"{repo_annotations.total_annotations} "
-                          f"!= total_annotated: {total_annotated}")
-                if total_func_vars_annotated != total_annotated:
-                    print(f"Error: total_func_vars_annotated: "
-                          f"{total_func_vars_annotated} "
-                          f"!= total_annotated: {total_annotated}")
-                # Add module to db
-                if not db:
-                    continue
-                try:
-                    relative_file_path = relative_file_path[:269]
-                    db.add_module_to_db(id_repo, relative_file_path, file,
-                                        repo_annotations.total_annotations)
-                except mysql.connector.errors.IntegrityError as e:
-                    # Module already exists in db
-                    if "Duplicate entry" not in e.msg:
-                        raise e
-                # Add functions and variables to db
-                for func_var in repo_annotations.funcs_and_vars:
-                    func_var = verify_name_length(func_var)
-                    try:
-                        db.add_func_var_to_db(
-                            func_var.repo_id, func_var.relative_path,
-                            func_var.name, func_var.lineno, func_var.num_var,
-                            func_var.num_var_annotated
-                        )
-                    except mysql.connector.errors.IntegrityError as e:
-                        # Functions/ variables already exists in db
-                        if "Duplicate entry" not in e.msg:
-                            raise e
-                # Add annotations to db
-                convert_fvt_to_str(repo_annotations.annotations)
-                for annot in repo_annotations.annotations:
-                    annot = verify_name_length(annot)
-                    try:
-                        db.add_annotation_to_db(
-                            annot.repo_id, annot.relative_path,
-                            annot.func_var_name, annot.lineno,
-                            annot.annot_name, annot.func_var_type,
-                            annot.base_type, annot.entire_annotation,
-                            annot.count
-                        )
-                    except mysql.connector.errors.IntegrityError as e:
-                        # Annotations already exists in db
-                        if "Duplicate entry" not in e.msg:
-                            raise e
-                if verbose:
-                    print("Done.")
-            except SyntaxError:
-                if verbose:
-                    print(f"SyntaxError in file {file_path}")
-            except ValueError:
-                if verbose:
-                    print(f"ValueError in file {file_path}")
-            except RecursionError:
-                if verbose:
-                    print(f"RecursionError in file {file_path}")
-            except UnboundLocalError:
-                if verbose:
-                    print(f"UnboundLocalError in file {file_path}")
-
-
-def convert_fvt_to_str(annotations):
-    """Converting enum FuncVarType to string ot print to database."""
-    for annotation in annotations:
-        if annotation.func_var_type == FuncVarType.FUNCTION_ARG:
-            annotation.func_var_type = "argument"
-        elif annotation.func_var_type == FuncVarType.FUNCTION_RETURN:
-            annotation.func_var_type = "return"
-        elif annotation.func_var_type == FuncVarType.VARIABLE:
-            annotation.func_var_type = "variable"
+    file_paths: list[str] = []
+    relative_file_paths: list[str] = []
+    file_names: list[str] = []
+    for file_path, relative_file_path, file in iter_python_files(repo_folder):
+        file_paths.append(file_path)
+        relative_file_paths.append(relative_file_path)
+        file_names.append(file)
+    # The files are independent of each other. Only adding the results to db has to happen in this process.
+    if executor is None:
+        results = map(analyze_file, file_paths, relative_file_paths, repeat(id_repo))
+    else:
+        results = executor.map(analyze_file, file_paths, relative_file_paths, repeat(id_repo), chunksize=8)
+    for file_path, relative_file_path, file, result in zip(file_paths, relative_file_paths, file_names, results):
+        # File could not be read
+        if result is None:
+            continue
+        # File could not be analyzed
+        if isinstance(result, str):
+            if verbose:
+                print(f"{result} in file {file_path}")
+            continue
+        if verbose:
+            print(f"{progress}%    Checking file: {file_path}.. ", end="")
+        # Add module to db
+        if not db:
+            continue
+        total_annotations, func_var_rows, annotation_rows = result
+        # Entries already in the database are skipped by the INSERT IGNORE queries of DBHelper
+        relative_file_path = relative_file_path[:269]
+        db.add_module_to_db(id_repo, relative_file_path, file,
+                            total_annotations)
+        # Add functions and variables to db
+        db.add_func_vars_many(func_var_rows)
+        # Add annotations to db
+        db.add_annotations_many(annotation_rows)
+        if verbose:
+            print("Done.")
+
+
+def iter_python_files(folder: str, prefix: str = ""):
+    """Yield the path, the relative path and the name of every python file in a folder and its sub-folders.
+    Stub files are only yielded if the corresponding python file exists. Folders in _IGNORED_FOLDERS are skipped.
+    Uses os.scandir, so the file type of an entry is known without another stat call.
+
+    Args:
+        folder (str) : Path to the folder.
+        prefix (str) : Relative path of folder, ending with '/'. Defaults to "" for the repository folder.
+
+    """
+    try:
+        with os.scandir(folder) as it:
+            entries = list(it)
+    except OSError:
+        return
+    files: set[str] = set()
+    sub_folders: list[os.DirEntry] = []
+    for entry in entries:
+        if entry.is_dir():
+            # Do not follow symlinks to folders, same as os.walk
+            if entry.name not in _IGNORED_FOLDERS and not entry.is_symlink():
+                sub_folders.append(entry)
         else:
-            raise ValueError("Unknown FuncVarType: " +
-                             repr(annotation.func_var_type))
+            files.add(entry.name)
+    for entry in entries:
+        file = entry.name
+        # Ignore folders and non-python files
+        if file not in files or not file.endswith(_PY_SUFFIXES):
+            continue
+        # Ignore stub files without corresponding python file
+        if file.endswith(".pyi") and file[:-1] not in files:
+            continue
+        yield entry.path, prefix + file, file
+    for entry in sub_folders:
+        yield from iter_python_files(entry.path, prefix + entry.name + "/")
+
+
+def parse_module(code: bytes, file_path: str) -> ast.Module:
+    """Parse the code of a module into its abstract syntax tree.
+    Calls compile directly, which is what ast.parse does after handling its keyword arguments. Errors carry the file
+    path instead of '<unknown>'. The source is passed as read from the file, the parser decodes it according to its
+    encoding declaration.
+    """
+    return compile(code, file_path, "exec", ast.PyCF_ONLY_AST, dont_inherit=True)
+
+
+def analyze_file(file_path: str, relative_file_path: str,
+                 id_repo: int) -> Union[None, str, tuple[int, list[tuple], list[tuple]]]:
+    """Analyze a single python file of a repository.
+    Does not need a database connection, so it can run in a worker process of analyze_repository.
+
+    Args:
+        file_path (str)          : Path to the file.
+        relative_file_path (str) : Path to the file relative to the repository folder.
+        id_repo (int)            : The id of the repository in the database.
+
+    Returns:
+        None if the file could not be read, the name of the error if it could not be analyzed.
+        Otherwise, the total number of annotations in the module and the rows for its functions and variables and
+        for its annotations as they are added to the database.
+
+    """
+    try:
+        with open(file_path, "rb") as f:
+            code = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        node = parse_module(code, file_path)
+        # Copy file path to clipboard in case it fails
+        # clipboard.copy(file_path)
+        # Initiate analyzer
+        repo_annotations = AnnotationAnalyzer(id_repo, relative_file_path)
+        # Check annotations
+        repo_annotations.visit(node)
+    except (SyntaxError, ValueError, RecursionError, UnboundLocalError) as e:
+        return type(e).__name__
+    # CHECKING CALCULATIONS
+    total_annotated = len(repo_annotations.annotations)
+    total_func_vars_annotated = sum(repo_annotations.fv_num_annot)
+    if repo_annotations.total_annotations != total_annotated:
+        print(f"Error: total_annotations: "
+              f"{repo_annotations.total_annotations} "
+              f"!= total_annotated: {total_annotated}")
+    if total_func_vars_annotated != total_annotated:
+        print(f"Error: total_func_vars_annotated: "
+              f"{total_func_vars_annotated} "
+              f"!= total_annotated: {total_annotated}")
+    return (repo_annotations.total_annotations,
+            func_var_rows(repo_annotations), annotation_rows(repo_annotations))
+
+
+def func_var_rows(analyzer: AnnotationAnalyzer) -> list[tuple]:
+    """Build the database rows for the functions and variables of an analyzed module.
+    Strings are cut to the lengths of the database columns.
+    """
+    repo_id = analyzer.repo_id
+    relative_path = analyzer.rel_path[:269]
+    return [(repo_id, relative_path, name[:134], lineno, num_var, num_var_annotated)
+            for name, lineno, num_var, num_var_annotated
+            in zip(analyzer.fv_names, analyzer.fv_linenos, analyzer.fv_num_var, analyzer.fv_num_annot)]
 
 
-def verify_name_length(obj: Union[FuncVar, Annotation]) -> Union[FuncVar, Annotation]:
-    """Limiting length of strings to apply with database constraints."""
-    if isinstance(obj, FuncVar):
-        obj.relative_path = obj.relative_path[:269]
-        obj.name = obj.name[:134]
-    elif isinstance(obj, Annotation):
-        obj.relative_path = obj.relative_path[:269]
-        obj.func_var_name = obj.func_var_name[:134]
-        obj.annot_name = obj.annot_name[:134]
-        obj.func_var_type = obj.func_var_type[:44]
-        obj.base_type = obj.base_type[:44]
-        obj.entire_annotation = obj.entire_annotation[:539]
-    return obj
+def annotation_rows(analyzer: AnnotationAnalyzer) -> list[tuple]:
+    """Build the database rows for the annotations of an analyzed module.
+    The FuncVarType is converted to the string stored in the database and strings are cut to the lengths of the
+    database columns.
+    """
+    relative_path = analyzer.rel_path[:269]
+    return [(repo_id, relative_path, func_var_name[:134], lineno, annot_name[:134], _FVT_STR[func_var_type],
+             base_type[:44], entire_annotation[:539], count)
+            for repo_id, _, func_var_name, lineno, annot_name, func_var_type, base_type, entire_annotation, count
+            in analyzer.annotations]
 
 
 def main_test():
     """This function is called when the analyzer exited with an error on a file.
     The last file is automatically copied to the clipboard and the path can be copied here."""
-    with open("../../repos/2013/nucleic/atom/atom/scalars.pyi") as f:
+    with open("../../repos/2013/nucleic/atom/atom/scalars.pyi", "rb") as f:
         code = f.read()
     node = ast.parse(code)
     repo_annotations = AnnotationAnalyzer()
@@ -749,14 +784,13 @@ def main_test():
         print(" ", func_var)
     print("\nAnnotations:")
     for annotation in repo_annotations.annotations:
-        print(" ", annotation)
+        print(" ", Annotation(*annotation))
 
 
 def main_unannotated():
     json_path = "unannot.json"
     # Build
-    # for repo in repo_list:
-    #     d = get_unannotated_arg_names(id_repo=repo[0], repo_path=repo[1], unannotated_names_dict=d)
+    # d = get_unannotated_arg_names_of_repos(repo_list)
     # Get number of unannotated arguments
     write_dict_to_json(d, json_path)
     d = load_from_json_to_dict(json_path)
@@ -768,53 +802,97 @@ def main_unannotated():
         print(key, value, total, round(value / total * 100, 2))
 
 
+def get_unannotated_arg_names_of_repos(repos: list[tuple[int, str]],
+                                      jobs: Optional[int] = None,
+                                      prefilter: bool = True) -> dict:
+    """Count the argument names of partially annotated functions in every given (id_repo, repo_path) repository.
+    The files of all repositories are analyzed by one pool of jobs processes (defaults to the number of usable CPUs).
+    jobs=1 analyzes them in this process."""
+    if jobs is None:
+        jobs = len(os.sched_getaffinity(0))
+    unannotated_names_dict: dict = {}
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as executor:
+        for id_repo, repo_path in repos:
+            get_unannotated_arg_names(id_repo, repo_path, unannotated_names_dict, executor, prefilter)
+    return unannotated_names_dict
+
+
 def get_unannotated_arg_names(id_repo: int, repo_path: str,
-                              unannotated_names_dict: dict) -> dict:
-    # Ignore the following folders
-    ignored_folders = ["mypy", "python2.6"]
-    for root, dirs, files in os.walk(repo_path):
-        for folder in ignored_folders:
-            if folder in dirs:
-                dirs.remove(folder)
-        for file in files:
-            # Ignore non-python files
-            file_path: str = os.path.join(root, file)
-            if not file.endswith(".py") and not file.endswith(".pyi"):
-                continue
-            # Ignore stub files without corresponding python file
-            if file.endswith(".pyi") and file[:-1] not in files:
-                continue
-            try:
-                with open(file_path) as f:
-                    code = f.read()
-            except (FileNotFoundError, UnicodeDecodeError):
-                continue
-            try:
-                node = ast.parse(code)
-                # Copy file path to clipboard in case it fails
-                # clipboard.copy(file_path)
-                # Initiate analyzer
-                repo_annotations = AnnotationAnalyzer(id_repo, repo_path)
-                # Check annotations
-                repo_annotations.visit(node)
-                for unannot_name in repo_annotations.unannotated_names:
-                    if unannot_name not in unannotated_names_dict:
-                        unannotated_names_dict[unannot_name] = 1
-                    else:
-                        unannotated_names_dict[unannot_name] += 1
-            except (SyntaxError, ValueError, RecursionError, UnboundLocalError):
-                pass
+                              unannotated_names_dict: dict,
+                              executor: Optional[Executor] = None,
+                              prefilter: bool = True) -> dict:
+    """Count the argument names of partially annotated functions in a repository.
+    The files are analyzed in executor, see get_unannotated_arg_names_of_repos, or one after another in this process
+    if it is None. With prefilter, files that cannot contain an annotated function are not parsed. Disable it to
+    check that the results stay the same."""
+    # Same files as analyze_repository
+    file_paths: list[str] = [file_path for file_path, _, _ in iter_python_files(repo_path)]
+    if executor is None:
+        results = map(unannotated_names_of_file, file_paths, repeat(id_repo), repeat(repo_path), repeat(prefilter))
+    else:
+        results = executor.map(unannotated_names_of_file, file_paths, repeat(id_repo), repeat(repo_path),
+                               repeat(prefilter), chunksize=8)
+    unannotated_names = Counter()
+    for names in results:
+        unannotated_names.update(names)
+    for unannot_name, count in unannotated_names.items():
+        unannotated_names_dict[unannot_name] = unannotated_names_dict.get(unannot_name, 0) + count
     return unannotated_names_dict
 
 
+def unannotated_names_of_file(file_path: str, id_repo: int, repo_path: str,
+                              prefilter: bool = True) -> list[str]:
+    """Get the argument names of partially annotated functions in a file.
+    Runs in the worker processes of get_unannotated_arg_names_of_repos."""
+    try:
+        with open(file_path, "rb") as f:
+            code = f.read()
+    except FileNotFoundError:
+        return []
+    if prefilter and not may_contain_annotated_function(code):
+        return []
+    try:
+        node = parse_module(code, file_path)
+        # Copy file path to clipboard in case it fails
+        # clipboard.copy(file_path)
+        # Initiate analyzer
+        repo_annotations = AnnotationAnalyzer(id_repo, repo_path)
+        # Check annotations
+        repo_annotations.visit(node)
+    except (SyntaxError, ValueError, RecursionError, UnboundLocalError):
+        return []
+    return repo_annotations.unannotated_names
+
+
+def may_contain_annotated_function(code: bytes) -> bool:
+    """Cheap text check run before parsing a module.
+    Only returns False if the module certainly has no function with an annotation: it has no def, or it has neither
+    a return annotation (->) nor anything looking like an annotated argument.
+
+    Examples:
+        >>> may_contain_annotated_function(b"x = 1")
+        False
+        >>> may_contain_annotated_function(b"def f(a, b):\\n    return a")
+        False
+        >>> may_contain_annotated_function(b"def f(a: int, b):\\n    return a")
+        True
+        >>> may_contain_annotated_function(b"def f(a, b) -> int:\\n    return a")
+        True
+
+    """
+    if b"def" not in code:
+        return False
+    return b"->" in code or _ARGUMENT_ANNOTATION_HINT.search(code) is not None
+
+
 def write_dict_to_json(d: dict, file_name: str):
-    with open(file_name, "w") as f:
-        json.dump(d, f)
+    with open(file_name, "wb") as f:
+        f.write(orjson.dumps(d))
 
 
 def load_from_json_to_dict(file_name) -> dict:
-    with open(file_name, "r") as f:
-        return json.load(f)
+    with open(file_name, "rb") as f:
+        return orjson.loads(f.read())
 
 
 if __name__ == "__main__":
@@ -1,14 +1,21 @@
 """This module was used for the mypy anylysis in the thesis."""
 import ast
-import json
+import functools
 import mypy.api
+import orjson
 import os
 import typing
 # Own module
 from scripts.sql.db_fill_repos import DBHelper
 
 
-basic_types = ["int", "float", "complex", "str", "bool"]
+basic_types = frozenset({"int", "float", "complex", "str", "bool"})
+# Number of checked repositories after which the mypy progress is written to disk
+_MYPY_SAVE_INTERVAL = 50
+
+
+class _Found(Exception):
+    pass
 
 
 class FunctionFinder(ast.NodeVisitor):
@@ -17,34 +24,41 @@ class FunctionFinder(ast.NodeVisitor):
         self.fount_function = None
 
     def visit_FunctionDef(self, node):
-        if self.fount_function:
-            return
         if node.name == self.function_name:
             self.fount_function = node
-            return
+            # Unwind the whole traversal instead of visiting the remaining nodes
+            raise _Found
         self.generic_visit(node)
 
 
+def _get_literal_name(node_slice):
+    if type(node_slice) is ast.Constant:
+        return node_slice.value
+    return "ERROR"
+
+
+def _get_union_name(node_slice):
+    if type(node_slice) is ast.Tuple:
+        for element in node_slice.elts:
+            ret_for_el = get_annotation_name(element)
+            if ret_for_el != "ERROR":
+                return ret_for_el
+
+
 def get_annotation_name(node):
-    if isinstance(node, ast.Name):
+    node_type = type(node)
+    if node_type is ast.Name:
         if node.id in basic_types:
             return node.id
         return "ERROR"
-    # Check if it is a literal
-    elif isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "Literal" and \
-            isinstance(node.slice, ast.Constant):
-        return node.slice.value
-    # Check if it is Optional
-    elif isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "Optional":
-        return get_annotation_name(node.slice)
-    # Check if it is a Union
-    elif isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "Union":
-        if isinstance(node.slice, ast.Tuple):
-            for element in node.slice.elts:
-                ret_for_el = get_annotation_name(element)
-                if ret_for_el != "ERROR":
-                    return ret_for_el
-    elif isinstance(node, ast.Constant):
+    elif node_type is ast.Subscript:
+        value = node.value
+        if type(value) is ast.Name:
+            handler = _SUBSCRIPT_HANDLERS.get(value.id)
+            if handler is not None:
+                return handler(node.slice)
+        return "ERROR"
+    elif node_type is ast.Constant:
         try:
             if node.value and 'dict' in node.value:  # Faulty type annotation
                 return "ERROR"
@@ -55,19 +69,40 @@ def get_annotation_name(node):
         return "ERROR"
 
 
-def get_function_ast(file_path: str, function_name: str) -> ast.FunctionDef:
-    finder = FunctionFinder(function_name)
+# Handlers for the subscript of Literal[...], Optional[...] and Union[...]
+_SUBSCRIPT_HANDLERS = {
+    "Literal": _get_literal_name,
+    "Optional": get_annotation_name,
+    "Union": _get_union_name,
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_file(file_path: str) -> typing.Optional[ast.Module]:
+    # Most files hold several of the looked up functions, parse them only once
     try:
-        with open(file_path, "r") as f:
+        with open(file_path, "rb") as f:
             code = f.read()
     except FileNotFoundError:
         return
     try:
-        tree = ast.parse(code)
+        return ast.parse(code)
+    except (SyntaxError, ValueError, RuntimeError):
+        return
+
+
+def get_function_ast(file_path: str, function_name: str) -> ast.FunctionDef:
+    tree = _parse_file(file_path)
+    if tree is None:
+        return
+    finder = FunctionFinder(function_name)
+    try:
         finder.visit(tree)
-        return finder.fount_function
-    except (SyntaxError, ValueError, RuntimeError, UnboundLocalError):
+    except _Found:
+        pass
+    except (RuntimeError, UnboundLocalError):
         return
+    return finder.fount_function
 
 
 def get_function_info(function_ast: ast.FunctionDef) -> (dict, str):
@@ -103,16 +138,21 @@ def create_argument_dict(args: dict) -> typing.Optional[dict]:
     return args
 
 
-def run_function(function_ast, args):
+@functools.lru_cache(maxsize=256)
+def _build_function(function_ast: ast.FunctionDef):
+    # Function ASTs come from the cached module trees, so each function is only compiled once
     # Convert AST to code
     code = compile(ast.Module(body=[function_ast], type_ignores=[]), filename="<ast>", mode="exec")
 
-    # Create a new namespace and execute the function
+    # Create a new namespace and execute the function definition
     namespace = {"Literal": typing.Literal}
     exec(code, namespace)
+    return namespace[function_ast.name]
 
+
+def run_function(function_ast, args):
     # Run the function with the provided arguments
-    return namespace[function_ast.name](**args)
+    return _build_function(function_ast)(**args)
 
 
 def my_type_check_function(function_ast: ast.FunctionDef):
@@ -149,13 +189,14 @@ def my_type_check_function(function_ast: ast.FunctionDef):
 
 
 def load_from_json(file_name: str) -> typing.Union[dict, list]:
-    with open(file_name, 'r') as f:
-        return json.load(f)
+    with open(file_name, 'rb') as f:
+        return orjson.loads(f.read())
 
 
 def store_to_json(file_name: str, data: dict):
-    with open(file_name, 'w') as f:
-        json.dump(data, f)
+    # Repository ids are int keys, written as strings like json.dump does
+    with open(file_name, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
 
 
 def get_repo_from_file_path(file_path: str) -> str:
@@ -193,21 +234,32 @@ def handle_mypy_file_with_return(repo_path: str) -> typing.Optional:
 
 def main_mypy(full_list, verbose: bool = False):
     handled_repo_json_file_path = "mypy_progress.json"
-    handled_repos: dict[int, bool] = load_from_json(handled_repo_json_file_path)
+    # JSON stores the repository ids as strings
+    handled_repos: dict[int, bool] = {int(repo_id): all_fine for repo_id, all_fine
+                                      in load_from_json(handled_repo_json_file_path).items()}
     # Get highest number already checked
     current_repo_id = 7066
     repos_to_check = get_repos_to_check(full_list, 0)
     total_repos = len(full_list)
-    for repo in repos_to_check:
-        if repo[0] <= current_repo_id:
-            continue
-        if verbose:
-            current_repo_id = repo[0]
-            print("{}% Checking repo: {}/{}".format(round(current_repo_id / 100, 2),
-                                                    current_repo_id, 10000))
-        all_fine = handle_mypy_file(repo[1])
-        handled_repos[repo[0]] = all_fine
-        store_to_json(handled_repo_json_file_path, handled_repos)
+    unsaved_repos = 0
+    try:
+        for repo in repos_to_check:
+            if repo[0] <= current_repo_id:
+                continue
+            if verbose:
+                current_repo_id = repo[0]
+                print("{}% Checking repo: {}/{}".format(round(current_repo_id / 100, 2),
+                                                        current_repo_id, 10000))
+            all_fine = handle_mypy_file(repo[1])
+            handled_repos[repo[0]] = all_fine
+            unsaved_repos += 1
+            if unsaved_repos >= _MYPY_SAVE_INTERVAL:
+                store_to_json(handled_repo_json_file_path, handled_repos)
+                unsaved_repos = 0
+    finally:
+        # Also keep the progress when the run is interrupted
+        if unsaved_repos:
+            store_to_json(handled_repo_json_file_path, handled_repos)
 
 
 def main():
@@ -215,8 +267,8 @@ def main():
     # Get fully annotated functions from database
     if verbose:
         print("Getting fully annotated functions from database...", end="")
-    db = DBHelper()
-    full_list = db.get_full_annotated_functions()
+    with DBHelper() as db:
+        full_list = db.get_full_annotated_functions()
     exit(len(full_list))
     # Check all functions with my checker
     if verbose:
@@ -224,7 +276,9 @@ def main():
     # Get mypy to check all files
     # mypy checks already done
     handled_repo_json_file_path = "mypy_progress.json"
-    handled_repos: dict[str, bool] = load_from_json(handled_repo_json_file_path)
+    # Ids of the repositories that were type correct according to mypy
+    mypy_fine_repos: set[int] = {int(repo_id) for repo_id, all_fine
+                                 in load_from_json(handled_repo_json_file_path).items() if all_fine}
     # main_mypy(full_list, verbose=True)
     last_progress = .0
     important_repo_stuff = []
@@ -237,11 +291,7 @@ def main():
         else:
             continue
         # Look for repositories that were type correct according to mypy
-        try:
-            mypy_fine = handled_repos[repr(func[0])]
-        except KeyError:
-            mypy_fine = False
-        if not mypy_fine:
+        if func[0] not in mypy_fine_repos:
             continue
         if verbose:
             progress = round(i / len(full_list) * 100, 1)
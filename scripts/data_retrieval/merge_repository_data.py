@@ -7,9 +7,13 @@ the number of repositories to 1000.
 """
 
 
-import json
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import os
 from typing import Union
 
+import orjson
+
 
 def generate_file_names(year: int,
                         number_iterations: int,
@@ -23,91 +27,54 @@ def generate_file_names(year: int,
     return output, files
 
 
-def eq_repos(repo1: dict, repo2: dict):
-    check = repo1['name'] == repo2['name'] and \
-        repo1['created_at'] == repo2['created_at']
-    if not check and repo1['name'] == repo2['name']:
-        print("ERROR: Only names are equal:", repo1['name'])
-    if not check and repo1['created_at'] == repo2['created_at']:
-        print("ERROR: Only dates are equal:", repo1['created_at'])
-    return check
-
-
-def get_repo_most_stars(j0, j1, j2, j3, j4) -> dict:
-    repo_with_most_stars = j0
-    if j1['stars'] > repo_with_most_stars['stars']:
-        repo_with_most_stars = j1
-    if j2['stars'] > repo_with_most_stars['stars']:
-        repo_with_most_stars = j2
-    if j3['stars'] > repo_with_most_stars['stars']:
-        repo_with_most_stars = j3
-    if j4['stars'] > repo_with_most_stars['stars']:
-        repo_with_most_stars = j4
-    return repo_with_most_stars
-
-
-def remove_repo_from_top(repository, repo_list, num: int = 10):
-    for i in range(num):
-        try:
-            if eq_repos(repository, repo_list[i]):
-                repo_list.pop(i)
-        except IndexError:
+def merge_results(file_out: str, files_in: list[str], len_json: int = 1000):
+    """Merge the repositories of files_in into file_out.
+    Every input file is sorted by descending stars (see correct_json), so a
+    k-way merge yields all repositories in that order. Repositories found
+    before are skipped, keeping the entry with the most stars.
+    """
+    repo_lists = list()
+    for file_in in files_in:
+        with open(file_in, 'rb') as f:
+            repo_lists.append(orjson.loads(f.read()))
+    data = list()
+    seen = set()
+    for repo in heapq.merge(*repo_lists, key=lambda x: -x['stars']):
+        key = repo_key(repo)
+        if key in seen:
+            continue
+        seen.add(key)
+        data.append(repo)
+        if len(data) == len_json:
             break
-    return repo_list
-
-
-def merge_results(file_out: str, files_in: list[str]):
-    assert len(files_in) == 5
-    with open(files_in[0], 'r') as f1, \
-            open(files_in[1], 'r') as f2, \
-            open(files_in[2], 'r') as f3, \
-            open(files_in[3], 'r') as f4, \
-            open(files_in[4], 'r') as f5, \
-            open(file_out, 'w', encoding='utf-8') as fo:
-        d1 = json.load(f1)
-        d2 = json.load(f2)
-        d3 = json.load(f3)
-        d4 = json.load(f4)
-        d5 = json.load(f5)
-        data = list()
-        len_json = 1000
-        for i in range(len_json):
-            if i == 177 or i == 234 or i == 293:
-                last = data[-1]
-                pass
-            repo = get_repo_most_stars(d1[0], d2[0], d3[0], d4[0], d5[0])
-            d1 = remove_repo_from_top(repo, d1)
-            d2 = remove_repo_from_top(repo, d2)
-            d3 = remove_repo_from_top(repo, d3)
-            d4 = remove_repo_from_top(repo, d4)
-            d5 = remove_repo_from_top(repo, d5)
-            data.append(repo)
-        json.dump(data, fo, ensure_ascii=False, indent=4)
-
-
-def is_in_repo(repository, repo_list):
-    for repo in repo_list:
-        if eq_repos(repo, repository):
-            return True
-    return False
+    with open(file_out, 'wb') as fo:
+        fo.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def repo_key(repo: dict) -> tuple[str, str]:
+    """Repositories with the same name and creation date are equal."""
+    return repo['name'], repo['created_at']
 
 
 def validate_json(file_name: str, verbose: Union[bool, str] = False):
-    with open(file_name) as f:
+    with open(file_name, 'rb') as f:
         if verbose:
             print("Checking file:", file_name)
-        data = json.load(f)
+        data = orjson.loads(f.read())
         valid_data = list()
+        seen = set()
         duplicates = 0
         order_errors = 0
         last_star = 1000000
         # Check duplicates
         for i, repo in enumerate(data):
-            if is_in_repo(repo, valid_data):
+            key = repo_key(repo)
+            if key in seen:
                 duplicates += 1
                 if verbose == "full":
                     print("Error: Duplicate #{}: {}".format(i, repo['name']))
             else:
+                seen.add(key)
                 valid_data.append(repo)
         # Checking descending star order
         for i, repo in enumerate(data):
@@ -128,28 +95,38 @@ def correct_json(file_name: str, verbose: Union[bool, str] = False):
         print("Correcting:", file_name)
     data = list()
     valid_data = list()
+    seen = set()
     # Read data
-    with open(file_name, 'r') as fr:
-        data = json.load(fr)
+    with open(file_name, 'rb') as fr:
+        data = orjson.loads(fr.read())
     # Ensure star-descending order
     data.sort(key=lambda x: x['stars'], reverse=True)
     for repo in data:
-        if not is_in_repo(repo, valid_data):
+        key = repo_key(repo)
+        if key not in seen:
+            seen.add(key)
             valid_data.append(repo)
     if verbose:
         if len(data) != len(valid_data):
             print("New length:", len(valid_data))
     # Write potentially new data to same file
-    with open(file_name, 'w', encoding='utf-8') as fw:
-        json.dump(valid_data, fw, ensure_ascii=False, indent=4)
+    with open(file_name, 'wb') as fw:
+        fw.write(orjson.dumps(valid_data, option=orjson.OPT_INDENT_2))
+
+
+def merge_year(year: int, number_iterations: int = 5):
+    """Correct and validate the result files of a year and merge them."""
+    output_file, input_files = generate_file_names(year, number_iterations, "json")
+    for file in input_files:
+        correct_json(file)
+        validate_json(file)
+    merge_results(output_file, input_files)
+    validate_json(output_file, verbose="full")
 
 
 if __name__ == '__main__':
     year_begin, year_end = 2013, 2022
-    for year in range(year_begin, year_end + 1):
-        output_file, input_files = generate_file_names(year, 5, "json")
-        for file in input_files:
-            correct_json(file)
-            validate_json(file)
-        merge_results(output_file, input_files)
-        validate_json(output_file, verbose="full")
+    years = range(year_begin, year_end + 1)
+    # The years do not depend on each other, so they are merged in parallel
+    with ProcessPoolExecutor(max_workers=min(len(years), os.cpu_count() or 1)) as executor:
+        list(executor.map(merge_year, years))
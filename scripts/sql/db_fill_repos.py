@@ -4,27 +4,110 @@ Use information read by read_repository_json.py for the repository table.
 Table module, func_var and annotation are filled by analyzer.py calling upon
 functions in this module.
 Since calls to the database are slow. Information from analyzer.py is stored
-in json files which then will be committed at once.
+in pickle files (formerly json files) which then will be committed at once.
 """
+import contextlib
 import mysql.connector
-import json
-import time
+from mysql.connector.abstracts import MySQLCursorAbstract
+import orjson
+import os
+import pickle
+import sys
+import tempfile
+from tqdm import tqdm
 from typing import Literal
 # Own imports
 import read_repository_json
 
 
+# Columns of the tables filled with the results of analyzer.py, in the order of the stored rows. Same as in the
+# insert queries, used by bulk_load
+_TABLE_COLUMNS = {
+    "module": ("repo_id", "path_rel", "name", "num_annotations"),
+    "func_var": ("repo_id", "path_rel", "name", "lineno", "num_var", "num_var_annotated"),
+    "annotation": ("repo_id", "path_rel", "func_var_name", "lineno", "annot_name",
+                   "func_var_type", "base_type", "entire_annotation", "count"),
+}
+# Columns whose few distinct strings repeat in most rows: path_rel, func_var_type and base_type
+_INTERNED_COLUMNS = {
+    "module": (1,),
+    "func_var": (1,),
+    "annotation": (1, 5, 6),
+}
+# Upper limit for the estimated size of one multi-row INSERT of make_commits
+_MAX_CHUNK_BYTES = 32 * 1024 * 1024
+# Escape sequences of the LOAD DATA text format for characters that would end a field or a line
+_LOAD_DATA_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def to_load_data_line(row) -> str:
+    """Format a row in the tab separated text format LOAD DATA reads by default.
+
+    Examples:
+        >>> to_load_data_line((1, "a\\tb", None, "c\\\\d"))
+        '1\\ta\\\\tb\\t\\\\N\\tc\\\\\\\\d\\n'
+
+    """
+    return "\t".join(
+        "\\N" if value is None
+        else value.translate(_LOAD_DATA_ESCAPES) if isinstance(value, str)
+        else str(value)
+        for value in row
+    ) + "\n"
+
+
+def intern_rows(rows, columns: tuple[int, ...]) -> list[tuple]:
+    """Convert rows to tuples and intern the strings of the given columns.
+    All rows then share one object per distinct string, e.g. a single
+    "argument" instead of one per annotation row loaded from json.
+
+    Examples:
+        >>> rows = intern_rows([[1, "a" * 20, 3], [2, "a" * 20, 4]], (1,))
+        >>> rows
+        [(1, 'aaaaaaaaaaaaaaaaaaaa', 3), (2, 'aaaaaaaaaaaaaaaaaaaa', 4)]
+        >>> rows[0][1] is rows[1][1]
+        True
+
+    """
+    intern = sys.intern
+    interned_rows = list()
+    for row in rows:
+        row = list(row)
+        for column in columns:
+            row[column] = intern(row[column])
+        interned_rows.append(tuple(row))
+    return interned_rows
+
+
 class DBHelper:
     def __init__(self):
         self.db = self.connect_to_db()
-        self.my_cursor: mysql.connector.cursor = self.db.cursor()
+        # Buffered, so every query reads its whole result and the cursor can
+        # be reused by all methods
+        self.my_cursor: MySQLCursorAbstract = self.db.cursor(buffered=True)
+        # Queries run once per repository are prepared on the server only once.
+        # Inserts stay on my_cursor, whose executemany sends one multi-row
+        # INSERT for queries matching RE_SQL_INSERT_STMT (see
+        # get_insert_queries). A prepared executemany runs one per row.
+        self.prepared_cursor: MySQLCursorAbstract = self.db.cursor(prepared=True)
         self.module_commits = list()
         self.func_var_commits = list()
         self.annotation_commits = list()
         (self.repo_insert_query, self.module_insert_query,
          self.func_var_insert_query, self.annotation_insert_query) = \
             self.get_insert_queries()
-        self.start_time = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the cursors and the connection to the database."""
+        self.my_cursor.close()
+        self.prepared_cursor.close()
+        self.db.close()
 
     @staticmethod
     def connect_to_db() -> mysql.connector.MySQLConnection:
@@ -32,31 +115,47 @@ class DBHelper:
             host="localhost",
             user="root",
             password="...",
-            database="thesis"
+            database="thesis",
+            # Inserts are committed explicitly, see make_commits
+            autocommit=False,
+            # Needed for LOAD DATA LOCAL INFILE, see bulk_load
+            allow_local_infile=True
         )
         return db
 
     def clear_table(self, table_name: str):
         """Clear the table with the given name."""
-        my_cursor = self.db.cursor()
-        my_cursor.execute(f"DELETE FROM {table_name}")
+        self.my_cursor.execute(f"DELETE FROM {table_name}")
         self.db.commit()
 
     @staticmethod
     def get_insert_queries():
+        """Get the insert queries of the repository, module, func_var and
+        annotation tables.
+        The connector only sends executemany as one multi-row INSERT if the
+        query matches its RE_SQL_INSERT_STMT, otherwise it runs one INSERT
+        per row.
+
+        Examples:
+            >>> from mysql.connector.cursor import RE_SQL_INSERT_STMT
+            >>> all(RE_SQL_INSERT_STMT.match(query)
+            ...     for query in DBHelper.get_insert_queries())
+            True
+
+        """
         return (
-            ("INSERT INTO repository "
-             "(id, year, user, name, creation_date, stars, clone_url)"
+            ("INSERT IGNORE INTO repository "
+             "(id, year, user, name, creation_date, stars, clone_url) "
              "VALUES (%s, %s, %s, %s, %s, %s, %s)"),
-            ("INSERT INTO module "
-             "(repo_id, path_rel, name, num_annotations)"
+            ("INSERT IGNORE INTO module "
+             "(repo_id, path_rel, name, num_annotations) "
              "VALUES (%s, %s, %s, %s)"),
-            ("INSERT INTO func_var "
-             "(repo_id, path_rel, name, lineno, num_var, num_var_annotated)"
+            ("INSERT IGNORE INTO func_var "
+             "(repo_id, path_rel, name, lineno, num_var, num_var_annotated) "
              "VALUES (%s, %s, %s, %s, %s, %s)"),
-            ("INSERT INTO annotation "
+            ("INSERT IGNORE INTO annotation "
              "(repo_id, path_rel, func_var_name, lineno, annot_name, "
-             "func_var_type, base_type, entire_annotation, count)"
+             "func_var_type, base_type, entire_annotation, count) "
              "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)")
         )
 
@@ -65,16 +164,15 @@ class DBHelper:
         The repositories and their data are read with the module
         read_repository_json.py.
         """
-        my_cursor = self.db.cursor()
         repo_handler = read_repository_json.RepoHandler()
         repo_handler.read_repo_files()
-        values = list()
-        for i, repo in repo_handler.repos:
-            values.append(
-                (i, repo.get_year(), repo.user, repo.name, repo.created_at,
-                 repo.stars, repo.clone_url)
-            )
-        my_cursor.executemany(self.repo_insert_query, values)
+        # Ids are given in the order the repositories are read
+        values = [
+            (i, repo.get_year(), repo.user, repo.name, repo.created_at,
+             repo.stars, repo.clone_url)
+            for i, repo in enumerate(repo_handler.repos)
+        ]
+        self.my_cursor.executemany(self.repo_insert_query, values)
         self.db.commit()
 
     def get_repo_id(self, year: str, user: str, name: str) -> int:
@@ -100,16 +198,16 @@ class DBHelper:
             -1
 
         """
-        my_cursor = self.my_cursor()
-        my_cursor.execute(
-            f"SELECT id FROM repository WHERE year = {year} AND user = '{user}' "
-            f"AND name = '{name}'"
+        self.prepared_cursor.execute(
+            "SELECT id FROM repository WHERE year = %s AND user = %s "
+            "AND name = %s",
+            (year, user, name)
         )
-        result = my_cursor.fetchone()
-        if result is None:
+        result = self.prepared_cursor.fetchall()
+        if not result:
             return -1
         else:
-            return result[0]
+            return result[0][0]
 
     def add_module_to_db(self, id_repo: int, path_rel: str, name: str,
                          num_annotations: int):
@@ -118,12 +216,12 @@ class DBHelper:
         self.module_commits.append(value)
 
     def get_module(self, id_repo: int, path_rel: str, name: str):
-        my_cursor = self.db.cursor()
-        my_cursor.execute(
-            f"SELECT * FROM module WHERE repo_id = {id_repo} AND "
-            f"path_rel = '{path_rel}' AND name = '{name}'"
+        self.my_cursor.execute(
+            "SELECT * FROM module WHERE repo_id = %s AND "
+            "path_rel = %s AND name = %s",
+            (id_repo, path_rel, name)
         )
-        return my_cursor.fetchone()
+        return self.my_cursor.fetchone()
 
     def add_func_var_to_db(self, repo_id, path_rel, name, lineno, num_var,
                            num_var_annotated):
@@ -131,6 +229,12 @@ class DBHelper:
         values = (repo_id, path_rel, name, lineno, num_var, num_var_annotated)
         self.func_var_commits.append(values)
 
+    def add_func_vars_many(self, rows):
+        """Called upon by outside module analyzer.py.
+        Adds the function and variable rows of a whole module at once."""
+        self.func_var_commits.extend(
+            intern_rows(rows, _INTERNED_COLUMNS["func_var"]))
+
     def add_annotation_to_db(self, repo_id, path_rel, func_var_name, lineno,
                              annot_name, func_var_type, base_type,
                              entire_annotation, count):
@@ -141,36 +245,119 @@ class DBHelper:
         )
         self.annotation_commits.append(values)
 
-    def save_to_json(self, filename: str):
-        data = {
-            "module_commits": self.module_commits,
-            "func_var_commits": self.func_var_commits,
-            "annotation_commits": self.annotation_commits
-        }
-        with open(filename, "w") as f:
-            json.dump(data, f)
+    def add_annotations_many(self, rows):
+        """Called upon by outside module analyzer.py.
+        Adds the annotation rows of a whole module at once."""
+        self.annotation_commits.extend(
+            intern_rows(rows, _INTERNED_COLUMNS["annotation"]))
+
+    def save_to_pickle(self, filename: str):
+        """Store the rows to commit in a binary pickle file.
+        Smaller and much faster to load than json. Rows stay tuples and
+        the interned strings are written once and shared again on load.
+        Every table is pickled on its own in the order of _TABLE_COLUMNS,
+        see iter_tables_from_pickle."""
+        with open(filename, "wb") as f:
+            for table in _TABLE_COLUMNS:
+                pickle.dump(getattr(self, table + "_commits"), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+    def iter_tables_from_pickle(self, filename: str, verbose: bool = False):
+        """Load the rows stored by save_to_pickle one table at a time.
+        The rows of a table are dropped before the next one is read, so
+        only one table is in memory at once. Only load files written by
+        analyzer.py, unpickling can run code.
+
+        Args:
+            filename (str): File written by save_to_pickle.
+            verbose (bool): Print progress.
+
+        Yields:
+            The name of the table whose rows were just loaded.
+        """
+        with open(filename, "rb") as f:
+            for table in _TABLE_COLUMNS:
+                if verbose:
+                    print("Loading data for {}s ... ".format(table), end="",
+                          flush=True)
+                setattr(self, table + "_commits", pickle.load(f))
+                if verbose:
+                    print("Done.")
+                yield table
+                setattr(self, table + "_commits", list())
 
     def load_from_json(self, filename: str, verbose: bool = False):
-        with open(filename, "r") as f:
-            data = json.load(f)
+        with open(filename, "rb") as f:
+            data = orjson.loads(f.read())
+        # Rows are popped, so the decoded lists are freed once converted
         if verbose:
             print("Loading data for modules... ", end="", flush=True)
-        self.module_commits = data["module_commits"]
+        self.module_commits = intern_rows(
+            data.pop("module_commits"), _INTERNED_COLUMNS["module"])
         if verbose:
             print("Done.\nLoading data for func_vars... ", end="", flush=True)
-        self.func_var_commits = data["func_var_commits"]
+        self.func_var_commits = intern_rows(
+            data.pop("func_var_commits"), _INTERNED_COLUMNS["func_var"])
         if verbose:
             print("Done.\nLoading data for annotations... ", end="", flush=True)
-        self.annotation_commits = data["annotation_commits"]
+        self.annotation_commits = intern_rows(
+            data.pop("annotation_commits"), _INTERNED_COLUMNS["annotation"])
         if verbose:
             print("Done.")
 
-    def safe_insert_commit(self, insert_query, values, verbose: bool = False):
+    @contextlib.contextmanager
+    def load_transaction(self, table: str):
+        """Load rows into a table in a single transaction.
+        The transaction is committed at the end and rolled back if loading
+        fails. Foreign keys are not checked and non-unique indexes are
+        disabled (MyISAM only, InnoDB ignores it) while loading. Unique
+        checks stay on, the INSERT IGNORE queries rely on them to skip
+        existing rows."""
+        self.my_cursor.execute("SET foreign_key_checks = 0")
+        # ALTER TABLE commits implicitly, so it runs outside the transaction
+        self.my_cursor.execute(f"ALTER TABLE {table} DISABLE KEYS")
         try:
-            self.my_cursor.execute(insert_query, values)
-        except mysql.connector.errors.IntegrityError as e:
-            if "Duplicate entry" not in e.msg:
-                raise e
+            try:
+                yield
+            except BaseException:
+                self.db.rollback()
+                raise
+            self.db.commit()
+        finally:
+            self.my_cursor.execute(f"ALTER TABLE {table} ENABLE KEYS")
+            self.my_cursor.execute("SET foreign_key_checks = 1")
+
+    @staticmethod
+    def split_into_chunks(rows: list, max_bytes: int):
+        """Split rows into chunks whose INSERT statement stays below max_bytes.
+        The size of a row is an upper bound of its part of the statement:
+        strings count their UTF-8 bytes twice, since escaping at most
+        doubles every byte, plus quotes and separators.
+
+        Examples:
+            >>> rows = [(1, "\u00e4" * 10)] * 4
+            >>> [len(chunk) for chunk in DBHelper.split_into_chunks(rows, 100)]
+            [2, 2]
+
+        """
+        chunk = list()
+        chunk_bytes = 0
+        for row in rows:
+            # Parentheses and the comma between rows
+            row_bytes = 3
+            for value in row:
+                if isinstance(value, str):
+                    row_bytes += 2 * len(value.encode()) + 4
+                else:
+                    row_bytes += len(str(value)) + 2
+            if chunk and chunk_bytes + row_bytes > max_bytes:
+                yield chunk
+                chunk = list()
+                chunk_bytes = 0
+            chunk.append(row)
+            chunk_bytes += row_bytes
+        if chunk:
+            yield chunk
 
     def make_commits(self, table: Literal["module", "func_var", "annotation"],
                      verbose: bool = False):
@@ -185,28 +372,58 @@ class DBHelper:
         else:  # table == "annotation"
             using = self.annotation_commits
             using_query = self.annotation_insert_query
-        # Set up progress information
-        total_queries = len(using)
-        current_query = 0
-        last_elapsed_time = 0
-        for values in using:
+        # Pack as many rows into one INSERT as the server accepts. The row
+        # sizes of split_into_chunks are upper bounds, the query text in front
+        # of the rows gets a margin of 1 KiB.
+        # fetchall reads the whole result, so the cursor is free for the
+        # inserts even if it is not buffered
+        self.my_cursor.execute("SELECT @@max_allowed_packet")
+        max_allowed_packet = self.my_cursor.fetchall()[0][0]
+        max_chunk_bytes = min(max_allowed_packet - 1024, _MAX_CHUNK_BYTES)
+        # All rows of the table are inserted in one transaction
+        with self.load_transaction(table), \
+                tqdm(total=len(using), desc="Committing " + table, unit=" rows",
+                     disable=not verbose, mininterval=0.5) as progress_bar:
+            for values in self.split_into_chunks(using, max_chunk_bytes):
+                # All insert queries are INSERT IGNORE, MySQL skips rows that
+                # already exist instead of raising an error
+                self.my_cursor.executemany(using_query, values)
+                progress_bar.update(len(values))
+        if verbose:
+            print("Done.")
+
+    def bulk_load(self, table: Literal["module", "func_var", "annotation"],
+                  verbose: bool = False):
+        """Load the stored rows of a table with LOAD DATA LOCAL INFILE.
+        Faster than make_commits for a full load since MySQL reads the rows
+        from a staged text file instead of executing insert statements.
+        Needs local_infile to be enabled on the server. Rows that already
+        exist are skipped, same as with the INSERT IGNORE queries.
+        """
+        if table == "module":
+            using = self.module_commits
+        elif table == "func_var":
+            using = self.func_var_commits
+        else:  # table == "annotation"
+            using = self.annotation_commits
+        columns = _TABLE_COLUMNS[table]
+        if verbose:
+            print("Writing {} {} entries to file ...".format(len(using), table))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, table + ".tsv")
+            with open(file_path, "w", encoding="utf-8", newline="") as f:
+                f.writelines(map(to_load_data_line, using))
             if verbose:
-                current_query += 1
-                progress = current_query / total_queries
-                elapsed_time = time.time() - self.start_time
-                estimated_total_time = elapsed_time / progress
-                remaining_time = time.strftime("%H:%M:%S", time.gmtime(estimated_total_time - elapsed_time))
-                elapsed_time = time.strftime("%H:%M:%S", time.gmtime(elapsed_time))
-                # Check if one second has passed since last print
-                if elapsed_time != last_elapsed_time:
-                    last_elapsed_time = elapsed_time
-                    print("Committing module... elapsed time: {} eta: {}, {}% ".format(
-                        elapsed_time,
-                        remaining_time,
-                        round(current_query / total_queries * 100, 2),
-                    ))
-            self.safe_insert_commit(using_query, values, verbose=verbose)
-        self.db.commit()
+                print("Loading {} ...".format(table))
+            with self.load_transaction(table):
+                self.my_cursor.execute(
+                    "LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {} "
+                    "CHARACTER SET utf8mb4 "
+                    "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                    "LINES TERMINATED BY '\\n' ({})".format(
+                        table, ", ".join(columns)),
+                    (file_path,)
+                )
         if verbose:
             print("Done.")
 
@@ -229,11 +446,11 @@ class DBHelper:
             14894
 
         """
-        my_cursor = self.db.cursor()
-        my_cursor.execute(
-            f"SELECT annotations_repo FROM repository WHERE id = {repo_id}"
+        self.my_cursor.execute(
+            "SELECT annotations_repo FROM repository WHERE id = %s",
+            (repo_id,)
         )
-        result = my_cursor.fetchone()
+        result = self.my_cursor.fetchone()
         if result is None:
             return 0
         else:
@@ -253,24 +470,35 @@ class DBHelper:
             func_var.name = annotation.func_var_name AND func_var.lineno = annotation.lineno
             GROUP BY func_var.repo_id, func_var.path_rel, func_var.name;
         """
-        my_cursor = self.db.cursor()
-        my_cursor.execute(
+        self.my_cursor.execute(
             f"SELECT * FROM full_annot"
         )
-        return my_cursor.fetchall()
+        return self.my_cursor.fetchall()
 
 
-def main(db: DBHelper, year: int):
-    db.load_from_json(f"db_query_{year}.json", verbose=True)
-    db.make_commits("module", verbose=True)
-    db.make_commits("func_var", verbose=True)
-    db.make_commits("annotation", verbose=True)
+def main(db: DBHelper, year: int, bulk: bool = True):
+    """Add the results of analyzer.py for a year to the database.
+    With bulk the tables are filled with LOAD DATA LOCAL INFILE, otherwise
+    with the batched inserts of make_commits."""
+    file_name = f"db_query_{year}"
+    if os.path.exists(file_name + ".pickle"):
+        # Only the rows of the table being committed are held in memory
+        tables = db.iter_tables_from_pickle(file_name + ".pickle",
+                                            verbose=True)
+    else:  # Results stored by older versions of analyzer.py
+        db.load_from_json(file_name + ".json", verbose=True)
+        tables = _TABLE_COLUMNS
+    for table in tables:
+        if bulk:
+            db.bulk_load(table, verbose=True)
+        else:
+            db.make_commits(table, verbose=True)
 
 
 if __name__ == '__main__':
-    db_helper = DBHelper()
-    # Initial setup to add all repos to the database
-    db_helper.fill_db_with_repos()
-    # Before running the next line analyzer.py should have run.
-    # That will have stored the data to commit in json files.
-    main(db_helper, 2013)
+    with DBHelper() as db_helper:
+        # Initial setup to add all repos to the database
+        db_helper.fill_db_with_repos()
+        # Before running the next line analyzer.py should have run.
+        # That will have stored the data to commit in pickle files.
+        main(db_helper, 2013)
@@ -8,10 +8,11 @@ Author: Christoph Janus
 
 """
 
-import json
 from os import path, getcwd
 from typing import Optional
 
+import orjson
+
 
 class Repo:
     """A Class for a GitHub repository used in my thesis.
@@ -20,6 +21,7 @@ class Repo:
         user (str)      : Creator of the repository.
         name (str)      : Name of the repository.
         created_at (str): Creation datetime of the repository.
+        year (int)      : Year of creation.
         clone_url (str) : Used to clone the repository.
         stars (int)     : Number of stars the repository got.
                           (At time of data collection)
@@ -31,6 +33,7 @@ class Repo:
                  creation_datetime: str = ""):
         self.user, self.name = name.split("/")
         self.created_at = self.format_datetime(creation_datetime)
+        self.year = int(self.created_at[:4]) if self.created_at else 0
         self.clone_url = url
         self.stars = stars
 
@@ -69,7 +72,7 @@ class Repo:
             2022
 
         """
-        return int(self.created_at[:4])
+        return self.year
 
 
 class RepoHandler:
@@ -77,6 +80,8 @@ class RepoHandler:
     It provides functions to read from the json-files."""
     def __init__(self):
         self.repos: list[Repo] = list()
+        # Index for get_repo, first repository read for every name
+        self._by_name: dict[str, Repo] = dict()
 
     def get_repo(self, repo_name: str) -> Optional[Repo]:
         """Get a repository by name.
@@ -87,10 +92,7 @@ class RepoHandler:
         Returns:
             A Repo object if the repository is in memory, else None.
         """
-        for repo in self.repos:
-            if repo.name == repo_name:
-                return repo
-        return None
+        return self._by_name.get(repo_name)
 
     def read_from_file(self, file_name: str):
         """Read repositories from a json file.
@@ -100,18 +102,18 @@ class RepoHandler:
             file_name (str): Name of the file to read from.
         """
         # Read repos from json file
-        with open(file_name) as f:
-            data = json.load(f)
+        with open(file_name, "rb") as f:
+            data = orjson.loads(f.read())
         # Add each repo to memory
         for repo in data:
-            self.repos.append(
-                Repo(
-                    name=repo['name'],
-                    url=repo['url'],
-                    stars=repo['stars'],
-                    creation_datetime=repo['created_at']
-                )
+            repo = Repo(
+                name=repo['name'],
+                url=repo['url'],
+                stars=repo['stars'],
+                creation_datetime=repo['created_at']
             )
+            self.repos.append(repo)
+            self._by_name.setdefault(repo.name, repo)
 
     def read_repo_files(self):
         """Read all repository files from 2013 to 2022."""
@@ -137,11 +139,10 @@ class RepoHandler:
             (2013, 12, 'cookiecutter')
 
         """
-        longest_name, year = "", int()
-        for repo in self.repos:
-            if len(repo.name) > len(longest_name):
-                longest_name, year = repo.name, repo.get_year()
-        return year, len(longest_name), longest_name
+        longest = max(self.repos, key=lambda repo: len(repo.name), default=None)
+        if longest is None:
+            return int(), 0, ""
+        return longest.get_year(), len(longest.name), longest.name
 
     def get_longest_clone_url(self) -> tuple[int, int, str]:
         """Get the longest clone url.
@@ -156,11 +157,10 @@ class RepoHandler:
             (2013, 58, 'https://github.com/facebookresearch/maskrcnn-benchmark.git')
 
         """
-        longest_url, year = "", int()
-        for repo in self.repos:
-            if len(repo.clone_url) > len(longest_url):
-                longest_url, year = repo.clone_url, repo.get_year()
-        return year, len(longest_url), longest_url
+        longest = max(self.repos, key=lambda repo: len(repo.clone_url), default=None)
+        if longest is None:
+            return int(), 0, ""
+        return longest.get_year(), len(longest.clone_url), longest.clone_url
 
 
 if __name__ == '__main__':